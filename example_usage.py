@@ -6,6 +6,11 @@ Word转GitBook工具使用示例
 
 import os
 import sys
+import logging
+from contextlib import redirect_stdout
+from copy import deepcopy
+from io import StringIO
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from docx import Document
 from docx.shared import Inches
@@ -69,11 +74,13 @@ def create_sample_word_document():
         ('配置文件', '生成GitBook所需的配置文件', '✅ 完成')
     ]
     
-    for feature, desc, status in features:
-        row_cells = table.add_row().cells
-        row_cells[0].text = feature
-        row_cells[1].text = desc
-        row_cells[2].text = status
+    # 以表头行为模板复制出数据行，直接追加到表格XML中（避免逐行调用add_row）
+    template_tr = table.rows[0]._tr
+    for row_values in features:
+        new_tr = deepcopy(template_tr)
+        for text_element, value in zip(new_tr.xpath('.//w:t'), row_values):
+            text_element.text = value
+        table._tbl.append(new_tr)
     
     # 第二章
     doc.add_heading('第二章：安装和使用', 1)
@@ -119,13 +126,10 @@ def create_sample_word_document():
     return sample_file
 
 
-def example_basic_conversion():
+def example_basic_conversion(sample_file):
     """基本转换示例"""
     print("\n=== 基本转换示例 ===")
     
-    # 创建示例文档
-    sample_file = create_sample_word_document()
-    
     # 基本配置
     config = GitBookConfig(
         title="示例技术文档",
@@ -142,13 +146,10 @@ def example_basic_conversion():
     print(f"输出目录: {config.output_dir}")
 
 
-def example_advanced_conversion():
+def example_advanced_conversion(sample_file):
     """高级转换示例"""
     print("\n=== 高级转换示例 ===")
     
-    # 创建示例文档
-    sample_file = create_sample_word_document()
-    
     # 高级配置
     config = GitBookConfig(
         title="高级技术手册",
@@ -167,13 +168,10 @@ def example_advanced_conversion():
     print(f"输出目录: {config.output_dir}")
 
 
-def example_minimal_conversion():
+def example_minimal_conversion(sample_file):
     """最小配置转换示例"""
     print("\n=== 最小配置转换示例 ===")
     
-    # 创建示例文档
-    sample_file = create_sample_word_document()
-    
     # 最小配置（只显示1级目录）
     config = GitBookConfig(
         title="简化文档",
@@ -190,6 +188,33 @@ def example_minimal_conversion():
     print(f"输出目录: {config.output_dir}")
 
 
+def _init_worker():
+    """进程池工作进程初始化：显示转换器的进度日志
+    
+    以spawn方式（macOS、Windows默认）启动的进程不会继承主进程的日志配置，
+    因此在每个工作进程中单独设置；fork继承来的处理器会被移除，避免重复输出。
+    """
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.setLevel(logging.INFO)
+
+
+def _run_example(example, sample_file):
+    """在进程池中运行一个示例，收集它的输出（print与日志）并返回，由主进程按顺序打印"""
+    output = StringIO()
+    log_handler = logging.StreamHandler(output)
+    log_handler.setFormatter(logging.Formatter("%(message)s"))
+    root_logger = logging.getLogger()
+    root_logger.addHandler(log_handler)
+    try:
+        with redirect_stdout(output):
+            example(sample_file)
+    finally:
+        root_logger.removeHandler(log_handler)
+    return output.getvalue()
+
+
 def cleanup_example_files():
     """清理示例文件"""
     print("\n=== 清理示例文件 ===")
@@ -222,10 +247,20 @@ def main():
     print("=" * 50)
     
     try:
-        # 运行各种示例
-        example_basic_conversion()
-        example_advanced_conversion()
-        example_minimal_conversion()
+        # 创建示例文档（只生成一次，供所有示例共用）
+        sample_file = create_sample_word_document()
+        
+        # 运行各种示例（输出目录互不相同，可以并行执行）
+        examples = [
+            example_basic_conversion,
+            example_advanced_conversion,
+            example_minimal_conversion
+        ]
+        with ProcessPoolExecutor(max_workers=len(examples), initializer=_init_worker) as executor:
+            futures = [executor.submit(_run_example, example, sample_file) for example in examples]
+            # 按示例顺序输出，避免各进程的输出交错
+            for future in futures:
+                print(future.result(), end="")
         
         print("\n" + "=" * 50)
         print("所有示例转换完成！")
@@ -7,45 +7,54 @@
 
 import os
 import sys
+import threading
 import webbrowser
+from functools import partial
 from pathlib import Path
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 import argparse
 
 
+class PreviewHTTPServer(ThreadingHTTPServer):
+    """预览服务器：重启时可立即复用处于TIME_WAIT状态的端口"""
+    allow_reuse_address = True
+
+
 def serve_gitbook(directory, port=8000):
     """启动简单的HTTP服务器预览GitBook"""
-    if not Path(directory).exists():
+    gitbook_dir = Path(directory)
+    
+    # 一次读取目录：同时确认目录存在并检查是否有GitBook文件
+    try:
+        names = {entry.name for entry in os.scandir(gitbook_dir)}
+    except (FileNotFoundError, NotADirectoryError):
         print(f"错误：目录不存在 - {directory}")
         return 1
     
-    # 检查是否有GitBook文件
-    gitbook_dir = Path(directory)
-    if not (gitbook_dir / "README.md").exists():
+    if "README.md" not in names:
         print(f"警告：目录中没有找到README.md文件")
     
-    if not (gitbook_dir / "SUMMARY.md").exists():
+    if "SUMMARY.md" not in names:
         print(f"警告：目录中没有找到SUMMARY.md文件")
     
-    # 切换到目标目录
-    os.chdir(directory)
+    gitbook_dir = gitbook_dir.absolute()
     
-    # 创建HTTP服务器
-    handler = SimpleHTTPRequestHandler
-    httpd = HTTPServer(("localhost", port), handler)
+    # 创建HTTP服务器（多线程，页面中的图片等资源可并发加载）
+    # 通过directory参数指定服务目录，不再切换进程的工作目录
+    handler = partial(SimpleHTTPRequestHandler, directory=str(gitbook_dir))
+    httpd = PreviewHTTPServer(("localhost", port), handler)
     
     print(f"🚀 启动GitBook预览服务器...")
-    print(f"📂 服务目录: {Path(directory).absolute()}")
+    print(f"📂 服务目录: {gitbook_dir}")
     print(f"🌐 访问地址: http://localhost:{port}")
     print(f"📖 直接打开: http://localhost:{port}/README.md")
     print(f"⏹️  按 Ctrl+C 停止服务器")
     print("-" * 50)
     
-    # 自动打开浏览器
-    try:
-        webbrowser.open(f"http://localhost:{port}")
-    except:
-        pass
+    # 在后台线程中稍后打开浏览器，不阻塞服务器启动
+    browser_timer = threading.Timer(0.1, webbrowser.open, args=(f"http://localhost:{port}",))
+    browser_timer.daemon = True
+    browser_timer.start()
     
     try:
         httpd.serve_forever()
@@ -13,22 +13,119 @@ import os
 import re
 import json
 import argparse
+import hashlib
+import logging
 import shutil
 from pathlib import Path
-from typing import List, Dict, Any, Tuple, Optional
-from dataclasses import dataclass
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, Optional, Iterator
+from dataclasses import dataclass, asdict
+from io import BytesIO, StringIO
 
 from docx import Document
 from docx.document import Document as DocxDocument
+from docx.enum.style import WD_STYLE_TYPE
 from docx.oxml.text.paragraph import CT_P
-from docx.oxml.table import CT_Tbl
-from docx.table import Table
-from docx.text.paragraph import Paragraph
+from docx.oxml.text.run import CT_R
+from docx.oxml.table import CT_Row, CT_Tbl
 from docx.shared import Inches
-from PIL import Image
-import markdown
-from bs4 import BeautifulSoup
+from lxml.etree import XPath
+
+
+logger = logging.getLogger("word_to_gitbook")
+
+_HEADING_RE = re.compile(r'Heading\s*(\d+)')
+
+# 输出目录中记录上次转换输入签名的文件名
+_SIGNATURE_FILENAME = ".word_to_gitbook.sig"
+
+# 输出格式版本，参与签名计算；转换结果的格式或命名规则变化时需要递增，使旧输出失效
+_OUTPUT_FORMAT_VERSION = "2"
+
+# SUMMARY.md中目录项链接的文件名（文件名经过清理，不含括号）
+_SUMMARY_LINK_RE = re.compile(r'\(([^()]+)\)$', re.MULTILINE)
+
+# 转换器自己生成的文件名（小写形式），章节文件不能与之重名
+_RESERVED_FILENAMES = frozenset({"readme.md", "summary.md"})
+
+# 章节文件的写缓冲区大小
+_CHAPTER_BUFFER_SIZE = 256 * 1024
+
+# 各级标题的Markdown前缀（下标即标题级别，Word标题最多9级）
+_HEADING_PREFIXES = tuple('#' * level + ' ' for level in range(10))
+
+# SUMMARY.md中各级目录项的缩进（下标为标题级别减1，Word标题最多9级）
+_TOC_INDENTS = tuple("  " * i for i in range(9))
+
+# 图片引用相关的命名空间与预编译XPath
+_NSMAP = {
+    'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main',
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'v': 'urn:schemas-microsoft-com:vml',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+}
+_XP_BLIP = XPath('.//a:blip', namespaces=_NSMAP)
+_XP_PICT_IMAGEDATA = XPath('.//w:pict//v:imagedata', namespaces=_NSMAP)
+_XP_HAS_IMAGE = XPath('boolean(w:r//a:blip | w:r//w:pict//v:imagedata)', namespaces=_NSMAP)
+_EMBED_ATTR = '{%s}embed' % _NSMAP['r']
+_ID_ATTR = '{%s}id' % _NSMAP['r']
+
+# run格式（w:rPr）相关的标签与取值
+_W_B = '{%s}b' % _NSMAP['w']
+_W_I = '{%s}i' % _NSMAP['w']
+_W_U = '{%s}u' % _NSMAP['w']
+_W_VAL = '{%s}val' % _NSMAP['w']
+_OFF_VALUES = ('0', 'false', 'off')
+
+
+@lru_cache(maxsize=128)
+def _classify_style(style_name: Optional[str]) -> int:
+    """根据样式名称返回标题级别，非标题样式（或没有名称的样式）返回0"""
+    if not style_name or not style_name.startswith('Heading'):
+        return 0
+    match = _HEADING_RE.search(style_name)
+    return int(match.group(1)) if match else 1
+
+
+def _write_bytes_unbuffered(path: Path, data: bytes) -> None:
+    """不经过Python的缓冲层，直接用os.write把整块数据写入文件"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+
+
+class _FilenameCharTable(dict):
+    """供str.translate使用的字符映射表，按需计算并缓存每个字符的处理方式
+    
+    文字、数字、下划线（含中文）保留；空白和连字符统一映射为连字符；其余字符删除。
+    """
+    
+    def __missing__(self, codepoint: int) -> Optional[str]:
+        char = chr(codepoint)
+        if char.isalnum() or char == '_':
+            value = char
+        elif char == '-' or char.isspace():
+            value = '-'
+        else:
+            value = None
+        self[codepoint] = value
+        return value
+
+
+_FILENAME_CHAR_TABLE = _FilenameCharTable()
+
+
+@lru_cache(maxsize=1024)
+def _clean_title(title: str) -> str:
+    """清理标题中的非法字符，并把连续的连字符合并为一个、去掉首尾连字符"""
+    mapped = title.translate(_FILENAME_CHAR_TABLE)
+    return '-'.join(part for part in mapped.split('-') if part)
 
 
 @dataclass
@@ -65,39 +162,89 @@ class WordToGitBookConverter:
         self.toc_items: List[TocItem] = []
         self.current_chapter = 1
         self.image_counter = 1
+        self.used_filenames = set(_RESERVED_FILENAMES)  # 已占用的文件名（小写形式）
         self.image_map = {}  # 映射rId到图片文件名
-        
-    def convert(self, word_file_path: str) -> None:
-        """主转换方法"""
-        print(f"开始转换Word文档: {word_file_path}")
+        # 图片Markdown引用的固定前后缀，插入图片时只需拼接文件名
+        self._image_link_prefix = f"\n\n![图片]({config.assets_dir}/"
+        self._image_link_suffix = ")\n\n"
+        
+    def convert(self, word_file_path: str, force: bool = False) -> None:
+        """主转换方法
+        
+        输出目录中记录了上次转换的输入签名（文档内容+配置），
+        签名一致时跳过转换；force为True时总是重新转换。
+        """
+        logger.info("开始转换Word文档: %s", word_file_path)
+        
+        # 读取Word文档并计算输入签名
+        word_data = Path(word_file_path).read_bytes()
+        signature = self._compute_signature(word_data)
+        if not force and self._is_output_up_to_date(signature):
+            logger.info("输入文档和配置均未变化，跳过转换。输出目录: %s", self.output_dir)
+            return
+        
+        # 重置章节和图片状态，同一个转换器可以多次转换
+        self.toc_items = []
+        self.current_chapter = 1
+        self.used_filenames = set(_RESERVED_FILENAMES)
+        self.image_counter = 1
+        self.image_map = {}
         
         # 创建输出目录
         self._create_output_directories()
         
         # 加载Word文档
-        doc = Document(word_file_path)
+        doc = Document(BytesIO(word_data))
         
         # 先提取所有图片（避免遭漏）
         self._extract_all_images(doc)
         
-        # 解析文档结构
-        self._parse_document_structure(doc)
-        
-        # 生成GitBook文件
-        self._generate_gitbook_files(doc)
+        # 单次遍历文档：解析目录结构的同时生成GitBook内容文件
+        self._generate_chapter_files(doc)
         
         # 生成配置文件
         self._generate_config_files()
         
-        print(f"转换完成！输出目录: {self.output_dir}")
+        # 转换成功后才写入签名
+        (self.output_dir / _SIGNATURE_FILENAME).write_text(signature, encoding='utf-8')
+        
+        logger.info("转换完成！输出目录: %s", self.output_dir)
+    
+    def _compute_signature(self, word_data: bytes) -> str:
+        """根据Word文档内容、转换配置和输出格式版本计算输入签名"""
+        hasher = hashlib.blake2b(word_data)
+        hasher.update(_OUTPUT_FORMAT_VERSION.encode('utf-8'))
+        hasher.update(json.dumps(asdict(self.config), ensure_ascii=False, sort_keys=True).encode('utf-8'))
+        return hasher.hexdigest()
+    
+    def _is_output_up_to_date(self, signature: str) -> bool:
+        """签名一致且生成的文件（含SUMMARY.md中列出的章节文件）都还在时，才认为输出是最新的"""
+        if self._read_signature() != signature:
+            return False
+        
+        try:
+            summary = (self.output_dir / "SUMMARY.md").read_text(encoding='utf-8')
+        except OSError:
+            return False
+        
+        filenames = ["README.md", "book.json"] + _SUMMARY_LINK_RE.findall(summary)
+        return all((self.output_dir / filename).is_file() for filename in filenames)
+    
+    def _read_signature(self) -> Optional[str]:
+        """读取输出目录中记录的上次转换签名"""
+        try:
+            return (self.output_dir / _SIGNATURE_FILENAME).read_text(encoding='utf-8')
+        except OSError:
+            return None
     
     def _extract_all_images(self, doc: DocxDocument) -> None:
         """提取文档中的所有图片（预先扫描）"""
-        print("扫描和提取所有图片...")
+        logger.info("扫描和提取所有图片...")
         
         # 从document的part中获取所有相关部分
         doc_part = doc.part
         image_count = 0
+        write_jobs = []  # (rel_id, 图片路径, 图片数据)
         
         for rel_id, related_part in doc_part.related_parts.items():
             # 检查是否是图片部分
@@ -107,25 +254,33 @@ class WordToGitBookConverter:
                     image_ext = self._get_image_extension(image_data)
                     image_filename = f"image_{self.image_counter:03d}.{image_ext}"
                     
-                    # 保存图片
-                    image_path = self.assets_dir / image_filename
-                    with open(image_path, 'wb') as f:
-                        f.write(image_data)
-                    
-                    # 建立映射关系
+                    # 建立映射关系，文件写入稍后统一提交
                     self.image_map[rel_id] = image_filename
-                    
-                    print(f"预先提取图片: {image_filename} (ID: {rel_id})")
+                    write_jobs.append((rel_id, self.assets_dir / image_filename, image_data))
                     self.image_counter += 1
-                    image_count += 1
                     
                 except Exception as e:
-                    print(f"提取图片 {rel_id} 时出错: {e}")
+                    logger.error("提取图片 %s 时出错: %s", rel_id, e)
+        
+        # 使用线程池并行保存图片
+        if write_jobs:
+            with ThreadPoolExecutor(max_workers=min(32, len(write_jobs))) as executor:
+                futures = [executor.submit(_write_bytes_unbuffered, image_path, image_data)
+                           for _, image_path, image_data in write_jobs]
+            
+            for future, (rel_id, image_path, _) in zip(futures, write_jobs):
+                try:
+                    future.result()
+                    logger.debug("预先提取图片: %s (ID: %s)", image_path.name, rel_id)
+                    image_count += 1
+                except Exception as e:
+                    self.image_map.pop(rel_id, None)
+                    logger.error("提取图片 %s 时出错: %s", rel_id, e)
         
         if image_count > 0:
-            print(f"共提取到 {image_count} 张图片")
+            logger.info("共提取到 %d 张图片", image_count)
         else:
-            print("文档中没有找到图片")
+            logger.info("文档中没有找到图片")
     
     def _create_output_directories(self) -> None:
         """创建输出目录结构"""
@@ -135,41 +290,12 @@ class WordToGitBookConverter:
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.assets_dir.mkdir(parents=True, exist_ok=True)
         
-        print(f"创建输出目录: {self.output_dir}")
-    
-    def _parse_document_structure(self, doc: DocxDocument) -> None:
-        """解析文档结构，提取标题层级"""
-        print("解析文档结构...")
-        
-        for para in doc.paragraphs:
-            if para.style.name.startswith('Heading'):
-                level = self._extract_heading_level(para.style.name)
-                if level <= self.config.max_toc_level:
-                    title = para.text.strip()
-                    if title:
-                        filename = self._generate_filename(title, level)
-                        toc_item = TocItem(title=title, filename=filename, level=level)
-                        self.toc_items.append(toc_item)
-        
-        # 如果没有找到标题，创建默认章节
-        if not self.toc_items:
-            self.toc_items.append(TocItem(
-                title="文档内容",
-                filename="content.md",
-                level=1
-            ))
-    
-    def _extract_heading_level(self, style_name: str) -> int:
-        """从样式名称提取标题级别"""
-        match = re.search(r'Heading\s*(\d+)', style_name)
-        return int(match.group(1)) if match else 1
+        logger.info("创建输出目录: %s", self.output_dir)
     
     def _generate_filename(self, title: str, level: int) -> str:
         """根据标题生成文件名"""
         # 清理标题，生成合法的文件名
-        clean_title = re.sub(r'[^\w\s\u4e00-\u9fff-]', '', title)  # 保留中文字符
-        clean_title = re.sub(r'[-\s]+', '-', clean_title)
-        clean_title = clean_title.strip('-')
+        clean_title = _clean_title(title)
         
         # 如果清理后为空或太短，使用默认命名
         if not clean_title or len(clean_title) < 2:
@@ -180,383 +306,242 @@ class WordToGitBookConverter:
         if len(clean_title) > 50:
             clean_title = clean_title[:50]
         
-        return f"{clean_title}.md"
-    
-    def _generate_gitbook_files(self, doc: DocxDocument) -> None:
-        """生成GitBook文件"""
-        print("生成GitBook内容文件...")
-        
-        if not self.toc_items:
-            # 如果没有目录结构，生成单一文件
-            self._generate_single_markdown_file(doc)
-        else:
-            # 按章节生成多个文件
-            self._generate_chapter_files(doc)
-    
-    def _generate_single_markdown_file(self, doc: DocxDocument) -> None:
-        """生成单一Markdown文件"""
-        content = self._convert_document_to_markdown(doc)
-        
-        output_file = self.output_dir / "content.md"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # 标题重复时追加序号，避免后面的章节覆盖前面的章节文件
+        # （按忽略大小写比较，兼容不区分大小写的文件系统）
+        filename = f"{clean_title}.md"
+        suffix = 2
+        while filename.casefold() in self.used_filenames:
+            filename = f"{clean_title}-{suffix}.md"
+            suffix += 1
+        self.used_filenames.add(filename.casefold())
+        
+        return filename
+    
+    def _build_style_levels(self, doc: DocxDocument) -> Tuple[Dict[str, int], int]:
+        """一次性建立段落样式ID到标题级别的映射，并返回默认段落样式的级别"""
+        style_levels = {
+            style.style_id: _classify_style(style.name)
+            for style in doc.styles
+            if style.type == WD_STYLE_TYPE.PARAGRAPH
+        }
+        default_style = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+        default_level = _classify_style(default_style.name) if default_style is not None else 0
+        return style_levels, default_level
     
-    def _generate_chapter_files(self, doc: DocxDocument) -> None:
-        """按章节生成多个Markdown文件"""
-        print("按章节生成文件...")
-        
-        # 建立标题到目录项的映射
-        title_to_toc = {}
-        for item in self.toc_items:
-            title_to_toc[item.title] = item
+    def _walk_body(self, doc: DocxDocument) -> Iterator[Tuple[Optional[TocItem], str]]:
+        """单次遍历文档正文
         
-        current_toc_item = None
-        current_content = []
-        toc_index = 0
+        遇到目录级别内的标题时创建目录项并产出 (目录项, 章节标题)，
+        其余段落和表格产出 (None, Markdown内容)。
+        段落直接读取底层XML元素，不再逐个构造python-docx的Paragraph对象。
+        """
+        style_levels, default_level = self._build_style_levels(doc)
         
         for element in doc.element.body:
             if isinstance(element, CT_P):
-                para = Paragraph(element, doc)
+                # 未指定或找不到样式时，与python-docx一致使用默认段落样式
+                level = style_levels.get(element.style, default_level)
                 
-                # 检查是否是标题
-                if para.style.name.startswith('Heading'):
-                    level = self._extract_heading_level(para.style.name)
-                    title = para.text.strip()
-                    
-                    # 检查是否是我们需要的目录级别标题
-                    if level <= self.config.max_toc_level and title and title in title_to_toc:
-                        # 保存当前章节内容
-                        if current_toc_item and current_content:
-                            self._save_chapter_content_by_item(current_toc_item, current_content)
-                            print(f"保存章节: {current_toc_item.title} -> {current_toc_item.filename}")
-                        
-                        # 开始新章节
-                        current_toc_item = title_to_toc[title]
-                        current_content = [f"# {title}\n\n"]
-                        toc_index += 1
-                    else:
-                        # 普通标题或子级标题，添加到当前内容中
-                        current_content.append(self._convert_paragraph_to_markdown(para))
-                else:
-                    # 普通段落
-                    current_content.append(self._convert_paragraph_to_markdown(para))
+                # 检查是否是我们需要的目录级别标题
+                if level:
+                    title = element.text.strip()
+                    if level <= self.config.max_toc_level and title:
+                        filename = self._generate_filename(title, level)
+                        toc_item = TocItem(title=title, filename=filename, level=level)
+                        self.toc_items.append(toc_item)
+                        yield toc_item, f"# {title}\n\n"
+                        continue
+                
+                # 普通段落、普通标题或子级标题
+                yield None, self._convert_paragraph_to_markdown(element, level)
             
             elif isinstance(element, CT_Tbl):
-                table = Table(element, doc)
-                current_content.append(self._convert_table_to_markdown(table))
-        
-        # 保存最后一个章节
-        if current_toc_item and current_content:
-            self._save_chapter_content_by_item(current_toc_item, current_content)
-            print(f"保存最后章节: {current_toc_item.title} -> {current_toc_item.filename}")
-    
-    def _save_chapter_content_by_item(self, toc_item: TocItem, content: List[str]) -> None:
-        """根据目录项保存章节内容到文件"""
-        filepath = self.output_dir / toc_item.filename
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(''.join(content))
-    
-    def _save_chapter_content(self, toc_index: int, content: List[str]) -> None:
-        """保存章节内容到文件"""
-        if toc_index < len(self.toc_items):
-            filename = self.toc_items[toc_index].filename
-            filepath = self.output_dir / filename
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(''.join(content))
+                yield None, self._convert_table_to_markdown(element)
     
-    def _convert_document_to_markdown(self, doc: DocxDocument) -> str:
-        """将整个文档转换为Markdown"""
-        markdown_content = []
+    def _generate_chapter_files(self, doc: DocxDocument) -> None:
+        """解析目录结构并按章节生成多个Markdown文件（边遍历边写入）"""
+        logger.info("解析文档结构并生成GitBook内容文件...")
         
-        for element in doc.element.body:
-            if isinstance(element, CT_P):
-                para = Paragraph(element, doc)
-                markdown_content.append(self._convert_paragraph_to_markdown(para))
-            elif isinstance(element, CT_Tbl):
-                table = Table(element, doc)
-                markdown_content.append(self._convert_table_to_markdown(table))
+        preamble = StringIO()  # 第一个目录级别标题之前的内容
+        current_toc_item = None
+        current_file = None
         
-        return ''.join(markdown_content)
-    
-    def _convert_paragraph_to_markdown(self, para: Paragraph) -> str:
-        """将段落转换为Markdown"""
-        if not para.text.strip():
+        try:
+            for toc_item, markdown_text in self._walk_body(doc):
+                if toc_item is not None:
+                    # 结束当前章节
+                    if current_file:
+                        current_file.close()
+                        logger.debug("保存章节: %s -> %s", current_toc_item.title, current_toc_item.filename)
+                    
+                    # 开始新章节，直接写入对应文件
+                    current_toc_item = toc_item
+                    current_file = open(self.output_dir / toc_item.filename, 'w',
+                                        encoding='utf-8', buffering=_CHAPTER_BUFFER_SIZE)
+                
+                if current_file:
+                    current_file.write(markdown_text)
+                else:
+                    preamble.write(markdown_text)
+        finally:
+            if current_file:
+                current_file.close()
+        
+        if current_toc_item:
+            logger.debug("保存最后章节: %s -> %s", current_toc_item.title, current_toc_item.filename)
+        else:
+            # 如果没有找到标题，整个文档作为默认章节
+            default_item = TocItem(title="文档内容", filename="content.md", level=1)
+            self.toc_items.append(default_item)
+            (self.output_dir / default_item.filename).write_text(preamble.getvalue(), encoding='utf-8')
+    
+    def _convert_paragraph_to_markdown(self, p: CT_P, heading_level: int = 0) -> str:
+        """将段落转换为Markdown（heading_level为0表示非标题段落）"""
+        para_text = p.text
+        if not para_text.strip():
             # 即使没有文本，也要检查是否有图片
-            image_text = self._process_images_in_paragraph(para, "")
+            image_text = self._process_images_in_paragraph(p, "")
             if image_text.strip():
                 return image_text + "\n"
             return "\n"
         
         # 处理标题
-        if para.style.name.startswith('Heading'):
-            level = self._extract_heading_level(para.style.name)
-            return f"{'#' * level} {para.text}\n\n"
+        if heading_level:
+            if heading_level < len(_HEADING_PREFIXES):
+                return _HEADING_PREFIXES[heading_level] + para_text + "\n\n"
+            return f"{'#' * heading_level} {para_text}\n\n"
         
         # 处理普通段落
-        text = self._process_paragraph_formatting(para)
+        text = self._process_paragraph_formatting(p)
         
         # 处理图片
-        text = self._process_images_in_paragraph(para, text)
+        text = self._process_images_in_paragraph(p, text)
         
         return f"{text}\n\n"
     
-    def _process_paragraph_formatting(self, para: Paragraph) -> str:
+    def _process_paragraph_formatting(self, p: CT_P) -> str:
         """处理段落格式化"""
-        result = ""
+        result = []
         
-        for run in para.runs:
-            text = run.text
+        for r in p.r_lst:
+            text = r.text
+            if not text:
+                continue
+            
+            bold, italic, underline = self._get_run_formatting(r)
             
             # 处理粗体
-            if run.bold:
+            if bold:
                 text = f"**{text}**"
             
             # 处理斜体
-            if run.italic:
+            if italic:
                 text = f"*{text}*"
             
             # 处理下划线（用HTML标签）
-            if run.underline:
+            if underline:
                 text = f"<u>{text}</u>"
             
-            result += text
+            result.append(text)
         
-        return result
+        return ''.join(result)
     
-    def _process_images_in_paragraph(self, para: Paragraph, text: str) -> str:
-        """处理段落中的图片"""
-        image_found = False
-        processed_rIds = set()  # 记录已处理的图片rId，避免重复
+    def _get_run_formatting(self, r: CT_R) -> Tuple[bool, bool, bool]:
+        """一次遍历w:rPr读取run的粗体、斜体、下划线设置"""
+        bold = italic = underline = False
+        rPr = r.rPr
+        if rPr is None:
+            return bold, italic, underline
         
-        for run in para.runs:
-            # 优先检查w:drawing元素（现代Word格式）
-            drawing_elements = run.element.xpath('.//w:drawing')
-            if drawing_elements:
-                try:
-                    for drawing in drawing_elements:
-                        # 查找其中的图片引用
-                        blips = drawing.xpath('.//a:blip')
-                        for blip in blips:
-                            rId = blip.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-                            if rId and rId in self.image_map and rId not in processed_rIds:
-                                image_filename = self.image_map[rId]
-                                text += f"\n\n![图片]({self.config.assets_dir}/{image_filename})\n\n"
-                                processed_rIds.add(rId)
-                                image_found = True
-                except Exception as e:
-                    print(f"处理drawing图片时出错: {e}")
-            
-            # 检查直接的a:blip元素（仅在没有drawing包装时）
-            elif run.element.xpath('.//a:blip'):
-                try:
-                    blip_elements = run.element.xpath('.//a:blip')
-                    for blip in blip_elements:
-                        rId = blip.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-                        if rId and rId in self.image_map and rId not in processed_rIds:
-                            image_filename = self.image_map[rId]
-                            text += f"\n\n![图片]({self.config.assets_dir}/{image_filename})\n\n"
-                            processed_rIds.add(rId)
-                            image_found = True
-                except Exception as e:
-                    print(f"处理blip图片时出错: {e}")
-            
-            # 检查w:pict元素（旧格式图片）
-            pict_elements = run.element.xpath('.//w:pict')
-            if pict_elements:
-                try:
-                    for pict in pict_elements:
-                        imagedatas = pict.xpath('.//v:imagedata')
-                        for imagedata in imagedatas:
-                            rId = imagedata.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id')
-                            if rId and rId in self.image_map and rId not in processed_rIds:
-                                image_filename = self.image_map[rId]
-                                text += f"\n\n![图片]({self.config.assets_dir}/{image_filename})\n\n"
-                                processed_rIds.add(rId)
-                                image_found = True
-                except Exception as e:
-                    print(f"处理pict图片时出错: {e}")
+        for child in rPr:
+            tag = child.tag
+            if tag == _W_B:
+                bold = child.get(_W_VAL) not in _OFF_VALUES
+            elif tag == _W_I:
+                italic = child.get(_W_VAL) not in _OFF_VALUES
+            elif tag == _W_U:
+                underline = child.get(_W_VAL) not in (None, 'none')
         
-        return text
+        return bold, italic, underline
     
-    def _get_image_reference(self, run) -> Optional[str]:
-        """获取已提取图片的引用"""
-        try:
-            blips = run.element.xpath('.//a:blip')
-            if blips:
-                rId = blips[0].get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-                if rId and rId in self.image_map:
-                    return self.image_map[rId]
-        except Exception as e:
-            print(f"获取图片引用时出错: {e}")
-        return None
-    
-    def _get_image_reference_from_drawing(self, run) -> Optional[str]:
-        """从drawing元素获取图片引用"""
-        try:
-            drawings = run.element.xpath('.//w:drawing')
-            for drawing in drawings:
-                blips = drawing.xpath('.//a:blip', namespaces={
-                    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-                    'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
-                })
-                
-                for blip in blips:
-                    rId = blip.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-                    if rId and rId in self.image_map:
-                        return self.image_map[rId]
-        except Exception as e:
-            print(f"从drawing获取图片引用时出错: {e}")
-        return None
-    
-    def _get_image_reference_from_pict(self, run) -> Optional[str]:
-        """从pict元素获取图片引用"""
-        try:
-            picts = run.element.xpath('.//w:pict')
-            for pict in picts:
-                imagedatas = pict.xpath('.//v:imagedata', namespaces={
-                    'v': 'urn:schemas-microsoft-com:vml',
-                    'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
-                })
-                
-                for imagedata in imagedatas:
-                    rId = imagedata.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id')
-                    if rId and rId in self.image_map:
-                        return self.image_map[rId]
-        except Exception as e:
-            print(f"从pict获取图片引用时出错: {e}")
-        return None
-    
-    def _extract_image_from_run(self, run) -> Optional[str]:
-        """从run中提取图片"""
-        try:
-            # 获取图片数据
-            blips = run.element.xpath('.//a:blip')
-            if blips:
-                rId = blips[0].get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-                if rId:
-                    image_part = run.part.related_parts[rId]
-                    image_data = image_part.blob
-                    
-                    # 确定图片格式
-                    image_ext = self._get_image_extension(image_data)
-                    image_filename = f"image_{self.image_counter:03d}.{image_ext}"
-                    
-                    # 保存图片
-                    image_path = self.assets_dir / image_filename
-                    with open(image_path, 'wb') as f:
-                        f.write(image_data)
-                    
-                    print(f"提取图片: {image_filename}")
-                    self.image_counter += 1
-                    return image_filename
-        except Exception as e:
-            print(f"从run提取图片时出错: {e}")
+    def _process_images_in_paragraph(self, p: CT_P, text: str) -> str:
+        """处理段落中的图片"""
+        # 绝大多数段落不含图片，先用一次XPath判断，避免逐个run查询
+        if not _XP_HAS_IMAGE(p):
+            return text
         
-        return None
-    
-    def _extract_image_from_drawing(self, run) -> Optional[str]:
-        """从drawing元素中提取图片"""
-        try:
-            # 查找w:drawing中的a:blip
-            drawings = run.element.xpath('.//w:drawing')
-            for drawing in drawings:
-                blips = drawing.xpath('.//a:blip', namespaces={
-                    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-                    'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
-                })
-                
-                for blip in blips:
-                    rId = blip.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-                    if rId and rId in run.part.related_parts:
-                        image_part = run.part.related_parts[rId]
-                        image_data = image_part.blob
-                        
-                        # 确定图片格式
-                        image_ext = self._get_image_extension(image_data)
-                        image_filename = f"image_{self.image_counter:03d}.{image_ext}"
-                        
-                        # 保存图片
-                        image_path = self.assets_dir / image_filename
-                        with open(image_path, 'wb') as f:
-                            f.write(image_data)
-                        
-                        print(f"从drawing提取图片: {image_filename}")
-                        self.image_counter += 1
-                        return image_filename
-        except Exception as e:
-            print(f"从drawing提取图片时出错: {e}")
+        processed_rIds = set()  # 记录已处理的图片rId，避免重复
+        
+        for r in p.r_lst:
+            for rId in self._get_image_rIds(r):
+                if rId and rId in self.image_map and rId not in processed_rIds:
+                    image_filename = self.image_map[rId]
+                    text += self._image_link_prefix + image_filename + self._image_link_suffix
+                    processed_rIds.add(rId)
         
-        return None
+        return text
     
-    def _extract_image_from_pict(self, run) -> Optional[str]:
-        """从pict元素中提取图片（旧格式）"""
+    def _get_image_rIds(self, r: CT_R) -> List[str]:
+        """获取run中引用的所有图片rId（drawing中的a:blip与旧格式pict中的v:imagedata）"""
         try:
-            # 查找w:pict中的图片
-            picts = run.element.xpath('.//w:pict')
-            for pict in picts:
-                # 查找v:imagedata或类似元素
-                imagedatas = pict.xpath('.//v:imagedata', namespaces={
-                    'v': 'urn:schemas-microsoft-com:vml',
-                    'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
-                })
-                
-                for imagedata in imagedatas:
-                    rId = imagedata.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id')
-                    if rId and rId in run.part.related_parts:
-                        image_part = run.part.related_parts[rId]
-                        image_data = image_part.blob
-                        
-                        # 确定图片格式
-                        image_ext = self._get_image_extension(image_data)
-                        image_filename = f"image_{self.image_counter:03d}.{image_ext}"
-                        
-                        # 保存图片
-                        image_path = self.assets_dir / image_filename
-                        with open(image_path, 'wb') as f:
-                            f.write(image_data)
-                        
-                        print(f"从pict提取图片: {image_filename}")
-                        self.image_counter += 1
-                        return image_filename
+            rIds = [blip.get(_EMBED_ATTR) for blip in _XP_BLIP(r)]
+            rIds.extend(imagedata.get(_ID_ATTR) for imagedata in _XP_PICT_IMAGEDATA(r))
+            return rIds
         except Exception as e:
-            print(f"从pict提取图片时出错: {e}")
-        
-        return None
+            logger.error("处理图片时出错: %s", e)
+            return []
     
     def _get_image_extension(self, image_data: bytes) -> str:
-        """根据图片数据获取文件扩展名"""
-        try:
-            with BytesIO(image_data) as img_io:
-                img = Image.open(img_io)
-                format_name = img.format.lower()
-                return format_name if format_name in ['png', 'jpg', 'jpeg', 'gif', 'bmp'] else 'png'
-        except:
+        """根据图片数据的文件头（魔数）获取文件扩展名"""
+        if image_data[:8] == b'\x89PNG\r\n\x1a\n':
             return 'png'
-    
-    def _convert_table_to_markdown(self, table: Table) -> str:
+        if image_data[:3] == b'\xff\xd8\xff':
+            return 'jpeg'
+        if image_data[:6] in (b'GIF87a', b'GIF89a'):
+            return 'gif'
+        if image_data[:2] == b'BM':
+            return 'bmp'
+        if image_data[:4] == b'RIFF' and image_data[8:12] == b'WEBP':
+            return 'webp'
+        return 'png'
+    
+    def _convert_table_to_markdown(self, tbl: CT_Tbl) -> str:
         """将表格转换为Markdown"""
-        if not table.rows:
+        rows = tbl.tr_lst
+        if not rows:
             return ""
         
         markdown_table = []
         
         # 处理表头
-        header_row = table.rows[0]
-        header_cells = [cell.text.strip() for cell in header_row.cells]
+        header_cells = [text.strip() for text in self._get_row_cell_texts(rows[0])]
         markdown_table.append("| " + " | ".join(header_cells) + " |")
         markdown_table.append("| " + " | ".join(["---"] * len(header_cells)) + " |")
         
         # 处理数据行
-        for row in table.rows[1:]:
-            data_cells = [cell.text.strip().replace('\n', '<br>') for cell in row.cells]
+        for tr in rows[1:]:
+            data_cells = [text.strip().replace('\n', '<br>') for text in self._get_row_cell_texts(tr)]
             markdown_table.append("| " + " | ".join(data_cells) + " |")
         
         return "\n".join(markdown_table) + "\n\n"
     
+    def _get_row_cell_texts(self, tr: CT_Row) -> List[str]:
+        """直接从XML读取一行中各单元格的文本
+        
+        与python-docx的row.cells保持一致：横向合并的单元格按跨越的列数重复，
+        纵向合并的后续单元格取合并起始单元格的内容。
+        """
+        texts = []
+        for tc in tr.tc_lst:
+            while tc.vMerge == "continue":
+                tc = tc._tc_above
+            text = "\n".join(p.text for p in tc.p_lst)
+            texts.extend([text] * tc.grid_span)
+        return texts
+    
     def _generate_config_files(self) -> None:
         """生成GitBook配置文件"""
-        print("生成GitBook配置文件...")
+        logger.info("生成GitBook配置文件...")
         
         # 生成book.json
         self._generate_book_json()
@@ -590,13 +575,16 @@ class WordToGitBookConverter:
         
         if self.toc_items:
             for item in self.toc_items:
-                indent = "  " * (item.level - 1)
+                if item.level <= len(_TOC_INDENTS):
+                    indent = _TOC_INDENTS[item.level - 1]
+                else:
+                    indent = "  " * (item.level - 1)
                 summary_content.append(f"{indent}* [{item.title}]({item.filename})\n")
         else:
             summary_content.append("* [文档内容](content.md)\n")
         
         with open(self.output_dir / "SUMMARY.md", 'w', encoding='utf-8') as f:
-            f.write(''.join(summary_content))
+            f.writelines(summary_content)
     
     def _generate_readme_md(self) -> None:
         """生成README.md介绍文件"""
@@ -632,12 +620,25 @@ def main():
     parser.add_argument("-l", "--language", default="zh-hans", help="语言设置（默认：zh-hans）")
     parser.add_argument("--max-toc-level", type=int, default=3, help="最大目录级别（默认：3）")
     parser.add_argument("--assets-dir", default="assets", help="资源文件目录名（默认：assets）")
+    parser.add_argument("-f", "--force", action="store_true", help="即使文档和配置未变化也重新转换")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("-v", "--verbose", action="store_true", help="输出每张图片、每个章节的详细日志")
+    verbosity.add_argument("-q", "--quiet", action="store_true", help="只输出警告和错误信息")
     
     args = parser.parse_args()
     
+    # 配置日志级别
+    if args.verbose:
+        log_level = logging.DEBUG
+    elif args.quiet:
+        log_level = logging.WARNING
+    else:
+        log_level = logging.INFO
+    logging.basicConfig(level=log_level, format="%(message)s")
+    
     # 检查输入文件是否存在
     if not os.path.exists(args.input_file):
-        print(f"错误：输入文件不存在 - {args.input_file}")
+        logger.error("错误：输入文件不存在 - %s", args.input_file)
         return 1
     
     # 创建配置
@@ -653,11 +654,11 @@ def main():
     # 执行转换
     converter = WordToGitBookConverter(config)
     try:
-        converter.convert(args.input_file)
-        print("转换成功完成！")
+        converter.convert(args.input_file, force=args.force)
+        logger.info("转换成功完成！")
         return 0
     except Exception as e:
-        print(f"转换失败：{e}")
+        logger.error("转换失败：%s", e)
         return 1
 
 